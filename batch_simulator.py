@@ -0,0 +1,580 @@
+"""
+Vectorised batch simulator for Monte Carlo runs of the line follower controller
+
+Steps thousands of independent robot/track/parameter instances at once with
+NumPy. The controller logic mirrors SensorManager, StateManager,
+PIDController, SpeedProfiler, JunctionHandler and RecoveryHandler, with
+every per-robot attribute turned into an array over the batch. The speed
+profiler only speeds up on segments with an expected distance in
+tracks["distances"]; without one every robot drives at its base speed.
+
+check_controller replays one reading sequence through the controller
+classes and through simulate, so the copied logic can't drift from them.
+"""
+import argparse
+import logging
+import sys
+import time
+from unittest import mock
+import numpy as np
+
+from config import (BASE_SPEED, SENSOR_THRESHOLD, RECOVERY_SPEED, PID_KP, PID_KI, PID_KD, INTEGRAL_CAP,
+                    JUNCTION_TURN_FACTOR, MIN_BLACK_SENSORS_JUNCTION, JUNCTION_COOLDOWN_TIME, LOOP_DELAY,
+                    SIM_MAX_WHEEL_SPEED, SIM_WHEEL_BASE, SIM_SENSOR_OFFSET, SIM_SENSOR_SPACING,
+                    SIM_LINE_HALF_WIDTH, SIM_JUNCTION_HALF_WIDTH, SIM_BLACK_LEVEL, SIM_WHITE_LEVEL, SIM_OFF_TRACK_DISTANCE,
+                    SIM_MAX_TIME, SPEED_PROFILE_MAX_SPEED, SPEED_PROFILE_RAMP_TIME, SPEED_PROFILE_BRAKE_TIME,
+                    SPEED_PROFILE_MIN_SEGMENT_TIME)
+from junction_handler import JunctionHandler
+from pid_controller import PIDController
+from recovery_handler import RecoveryHandler
+from sensors import SensorManager
+from speed_profiler import SpeedProfiler
+from state_manager import StateManager, STATE_LINE_FOLLOWING, STATE_JUNCTION, STATE_LOST
+
+# Integer codes for the StateManager states
+SIM_LINE_FOLLOWING = 0
+SIM_JUNCTION = 1
+SIM_LOST = 2
+
+# Integer codes for route directions
+DIRECTION_CODES = {"STRAIGHT": 0, "LEFT": 1, "RIGHT": 2}
+
+SENSOR_WEIGHTS = np.array([-2, -1, 0, 1, 2], dtype=float)
+SENSOR_OFFSETS = SENSOR_WEIGHTS * SIM_SENSOR_SPACING
+
+PARAMETER_DEFAULTS = {
+    "base_speed": BASE_SPEED,
+    "kp": PID_KP,
+    "ki": PID_KI,
+    "kd": PID_KD,
+    "integral_cap": INTEGRAL_CAP,
+    "turn_factor": JUNCTION_TURN_FACTOR,
+    "recovery_speed": RECOVERY_SPEED,
+    "cooldown": JUNCTION_COOLDOWN_TIME,
+    "min_black": MIN_BLACK_SENSORS_JUNCTION,
+    "threshold": SENSOR_THRESHOLD,
+    "max_speed": SPEED_PROFILE_MAX_SPEED,
+    "ramp_time": SPEED_PROFILE_RAMP_TIME,
+    "brake_time": SPEED_PROFILE_BRAKE_TIME,
+    "min_segment_time": SPEED_PROFILE_MIN_SEGMENT_TIME,
+    "noise": 0.0,
+}
+
+
+def make_params(n, **overrides):
+    """
+    Build per-robot controller parameters for a batch
+
+    Args:
+        n (int): Number of robots in the batch
+        **overrides: Scalars or length-n arrays replacing PARAMETER_DEFAULTS
+
+    Returns:
+        dict: Parameter name to float array of length n
+    """
+    unknown = set(overrides) - set(PARAMETER_DEFAULTS)
+    if unknown:
+        raise ValueError(f"Unknown simulator parameters: {sorted(unknown)}")
+    params = dict(PARAMETER_DEFAULTS, **overrides)
+    return {name: np.broadcast_to(np.asarray(value, dtype=float), (n,)).copy()
+            for name, value in params.items()}
+
+
+def random_tracks(n, junctions=3, rng=None, min_length=0.3, max_length=1.5, max_curvature=2.0):
+    """
+    Generate random track layouts, one per robot
+
+    A track is a chain of segments that each end in a junction. The robot
+    turns according to its route at every junction and arrives at its
+    table at the last one.
+
+    Args:
+        n (int): Number of tracks
+        junctions (int): Junctions per route
+        rng (np.random.Generator): Random source
+        min_length (float): Shortest segment in meters
+        max_length (float): Longest segment in meters
+        max_curvature (float): Largest segment curvature in 1/m
+
+    Returns:
+        dict: Track arrays "lengths", "curvature", "route" of shape (n, junctions)
+            and "route_len" of shape (n,)
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    return {
+        "lengths": rng.uniform(min_length, max_length, (n, junctions)),
+        "curvature": rng.uniform(-max_curvature, max_curvature, (n, junctions)),
+        "route": rng.integers(0, len(DIRECTION_CODES), (n, junctions)),
+        "route_len": np.full(n, junctions),
+    }
+
+
+def route_track(route, lengths, curvature=None):
+    """Build a single-robot track from a route plan such as ["RIGHT", "LEFT"]"""
+    lengths = np.asarray(lengths, dtype=float)
+    curvature = np.zeros_like(lengths) if curvature is None else np.asarray(curvature, dtype=float)
+    return {
+        "lengths": lengths[None, :],
+        "curvature": curvature[None, :],
+        "route": np.array([[DIRECTION_CODES[step] for step in route]]),
+        "route_len": np.array([len(route)]),
+    }
+
+
+def learned_distances(tracks, base_speed=BASE_SPEED):
+    """
+    Segment distances as the floor map learns them from clean runs
+
+    Args:
+        tracks (dict): Per-robot tracks from random_tracks
+        base_speed (float): Scalar or per-robot base speed the distances are measured at
+
+    Returns:
+        np.ndarray: Seconds of travel at the base speed for every segment, shape (n, junctions)
+    """
+    base_speed = np.broadcast_to(np.asarray(base_speed, dtype=float), tracks["route_len"].shape)
+    return tracks["lengths"] / (base_speed[:, None] * SIM_MAX_WHEEL_SPEED)
+
+
+def simulate(params, tracks, rng=None, dt=LOOP_DELAY, max_time=SIM_MAX_TIME, substeps=4,
+             sensor_readings=None, trace=False):
+    """
+    Run every robot in the batch until it arrives, fails or runs out of time
+
+    Args:
+        params (dict): Per-robot parameters from make_params
+        tracks (dict): Per-robot tracks from random_tracks, optionally with expected
+            segment "distances" for the speed profiler (NaN when unknown)
+        rng (np.random.Generator): Random source for sensor noise
+        dt (float): Control loop period in seconds
+        max_time (float): Simulated time limit in seconds
+        substeps (int): Physics integration steps per control period
+        sensor_readings (np.ndarray): Binary readings of shape (steps, n, 5) that replace
+            the sensor and physics model, to replay a recorded sequence
+        trace (bool): Also return the motor speeds of every step
+
+    Returns:
+        dict: Per-robot result arrays, plus "left_speed" and "right_speed" of
+            shape (steps, n) when tracing
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    n = tracks["route_len"].shape[0]
+    rows = np.arange(n)
+    last_segment = tracks["lengths"].shape[1] - 1
+    base = params["base_speed"]
+    distances = tracks.get("distances", np.full(tracks["lengths"].shape, np.nan))
+    replay = sensor_readings is not None
+    steps = int(max_time / dt) if not replay else min(int(max_time / dt), len(sensor_readings))
+
+    # Robot pose relative to the line it is following
+    offset = rng.normal(0.0, 0.003, n)      # Sensor row distance to the right of the line
+    heading = rng.normal(0.0, 0.05, n)      # Heading to the right of the line direction
+    along = np.zeros(n)                     # Distance travelled along the current segment
+    segment = np.zeros(n, dtype=int)        # Physical segment the robot is on
+
+    # Controller state, one entry per robot
+    state = np.full(n, SIM_LINE_FOLLOWING)
+    last_valid = np.ones((n, 5))
+    has_valid = np.zeros(n, dtype=bool)
+    last_error = np.zeros(n)
+    integral = np.zeros(n)
+    cooldown_active = np.zeros(n, dtype=bool)
+    cooldown_start = np.zeros(n)
+    handled = np.zeros(n, dtype=bool)
+    junction_count = np.zeros(n, dtype=int)
+    turn_speeds = np.zeros((n, 2))
+    lost_start = np.zeros(n)
+    progress = np.zeros(n)                  # Profiled distance driven on the current segment
+    segment_clean = np.ones(n, dtype=bool)
+    last_apply = np.full(n, np.nan)
+
+    # Outcomes
+    done = np.zeros(n, dtype=bool)
+    arrived = np.zeros(n, dtype=bool)
+    crashed = np.zeros(n, dtype=bool)
+    junction_error = np.zeros(n, dtype=bool)
+    lap_time = np.full(n, np.nan)
+    lost_episodes = np.zeros(n, dtype=int)
+    lost_steps = np.zeros(n, dtype=int)
+    left_trace = []
+    right_trace = []
+
+    for step in range(steps):
+        if done.all():
+            break
+        t = step * dt
+        active = ~done
+        segment_length = tracks["lengths"][rows, np.minimum(segment, last_segment)]
+
+        # SensorManager.read_sensors
+        if replay:
+            readings = np.asarray(sensor_readings[step], dtype=float)
+        else:
+            on_line = (np.abs(offset[:, None] + SENSOR_OFFSETS[None, :] * np.cos(heading)[:, None])
+                       < SIM_LINE_HALF_WIDTH)
+            # Each sensor crosses the junction line at its own position along the track
+            sensor_along = along[:, None] - SENSOR_OFFSETS[None, :] * np.sin(heading)[:, None]
+            on_junction = np.abs(sensor_along - segment_length[:, None]) < SIM_JUNCTION_HALF_WIDTH
+            levels = np.where(on_line | on_junction, SIM_BLACK_LEVEL, SIM_WHITE_LEVEL)
+            levels = levels + params["noise"][:, None] * rng.standard_normal((n, 5))
+            readings = (levels > params["threshold"][:, None]).astype(float)
+        black_count = (readings == 0).sum(axis=1)
+        last_valid = np.where((black_count > 0)[:, None], readings, last_valid)
+        has_valid |= black_count > 0
+
+        # StateManager.update_state
+        previous_state = state.copy()
+        junction = black_count >= params["min_black"]
+        lost = ~junction & (black_count == 0)
+        following = ~junction & ~lost
+        entering = junction & ~cooldown_active
+        state = np.where(entering, SIM_JUNCTION, state)
+        cooldown_start = np.where(entering, t, cooldown_start)
+        cooldown_active |= entering
+        handled &= ~entering
+        new_lost = lost & (previous_state != SIM_LOST) & active
+        state = np.where(lost, SIM_LOST, state)
+        lost_start = np.where(new_lost, t, lost_start)
+        lost_episodes += new_lost
+        state = np.where(following, SIM_LINE_FOLLOWING, state)
+        handled &= ~following
+        cooldown_active &= (t - cooldown_start) < params["cooldown"]
+
+        left = np.zeros(n)
+        right = np.zeros(n)
+
+        # PIDController.calculate
+        pid = state == SIM_LINE_FOLLOWING
+        inverted = 1 - readings
+        inverted_sum = inverted.sum(axis=1)
+        error = np.where(inverted_sum == 0, last_error,
+                         (inverted @ SENSOR_WEIGHTS) / np.maximum(inverted_sum, 1))
+        new_integral = np.where(np.abs(error) < 0.5,
+                                np.clip(integral + error, -params["integral_cap"], params["integral_cap"]),
+                                integral)
+        derivative = error - last_error
+        adjustment = params["kp"] * error + params["ki"] * new_integral + params["kd"] * derivative
+        min_speed = base * 0.3
+        left = np.where(pid, np.clip(base + adjustment, min_speed, 1.0), left)
+        right = np.where(pid, np.clip(base - adjustment, min_speed, 1.0), right)
+        integral = np.where(pid, new_integral, integral)
+        last_error = np.where(pid, error, last_error)
+
+        # SpeedProfiler.apply, raising the PID output on long clear segments
+        expected = distances[rows, np.minimum(junction_count, last_segment)]
+        remaining = expected - progress - params["brake_time"]
+        ramp = np.minimum(np.minimum(1.0, progress / params["ramp_time"]), remaining / params["ramp_time"])
+        profiled = (segment_clean & (junction_count < tracks["route_len"])
+                    & (expected >= params["min_segment_time"]) & (remaining > 0))
+        target = np.where(profiled, base + (params["max_speed"] - base) * ramp, base)
+        elapsed = np.where(np.isnan(last_apply), 0.0, np.minimum(t - last_apply, LOOP_DELAY * 4))
+        progress = np.where(pid, progress + elapsed * target / base, progress)
+        last_apply = np.where(pid, t, last_apply)
+        boosted = pid & (target != base)
+        left = np.where(boosted, np.minimum(1.0, left + (target - base)), left)
+        right = np.where(boosted, np.minimum(1.0, right + (target - base)), right)
+
+        # JunctionHandler.handle_junction
+        new_junction = (state == SIM_JUNCTION) & ~handled & active
+        handled |= new_junction
+        has_step = new_junction & (junction_count < tracks["route_len"])
+        direction = tracks["route"][rows, np.minimum(junction_count, last_segment)]
+        turn = base * params["turn_factor"]
+        junction_left = np.select([direction == DIRECTION_CODES["LEFT"], direction == DIRECTION_CODES["RIGHT"]],
+                                  [0.0, turn], base)
+        junction_right = np.select([direction == DIRECTION_CODES["LEFT"], direction == DIRECTION_CODES["RIGHT"]],
+                                   [turn, 0.0], base)
+        turn_speeds[has_step] = np.column_stack((junction_left, junction_right))[has_step]
+        turn_speeds[new_junction & ~has_step] = 0.0
+        junction_count += has_step
+        progress[new_junction] = 0.0
+        segment_clean |= new_junction
+        last_apply[new_junction] = np.nan
+        turning = state == SIM_JUNCTION
+        left = np.where(turning, turn_speeds[:, 0], left)
+        right = np.where(turning, turn_speeds[:, 1], right)
+
+        # Arrival once the last junction of the route has been handled
+        finished = new_junction & (junction_count >= tracks["route_len"])
+        arrived |= finished
+        lap_time = np.where(finished, t, lap_time)
+        done |= finished
+
+        # RecoveryHandler.handle_lost_line
+        recovering = state == SIM_LOST
+        recovery_factor = np.minimum(1.0, (t - lost_start) / 2.0)
+        recovery = np.maximum(0.4, base * params["recovery_speed"] * recovery_factor)
+        weighted_sum = np.where(has_valid, (1 - last_valid) @ SENSOR_WEIGHTS, 0.0)
+        left = np.where(recovering, np.where(weighted_sum < 0, 0.0, recovery), left)
+        right = np.where(recovering, np.where(weighted_sum < 0, recovery, 0.0), right)
+        lost_steps += recovering & ~done
+        segment_clean &= ~recovering
+
+        # MotorController.set_motor_speed
+        left = np.where(done, 0.0, np.clip(left, 0, 1))
+        right = np.where(done, 0.0, np.clip(right, 0, 1))
+        if trace:
+            left_trace.append(left)
+            right_trace.append(right)
+        if replay:
+            continue
+
+        # Differential drive kinematics of the sensor row relative to the line
+        speed = (left + right) / 2 * SIM_MAX_WHEEL_SPEED
+        rotation = (left - right) * SIM_MAX_WHEEL_SPEED / SIM_WHEEL_BASE
+        h = dt / substeps
+        for _ in range(substeps):
+            curvature = tracks["curvature"][rows, np.minimum(segment, last_segment)]
+            along_speed = speed * np.cos(heading) - SIM_SENSOR_OFFSET * rotation * np.sin(heading)
+            offset = offset + (speed * np.sin(heading) + SIM_SENSOR_OFFSET * rotation * np.cos(heading)) * h
+            along = along + along_speed * h
+            heading = heading + (rotation - curvature * along_speed) * h
+            heading = (heading + np.pi) % (2 * np.pi) - np.pi
+
+            # Crossing a junction moves the robot onto the next segment of its route
+            crossing = ~done & (along >= tracks["lengths"][rows, np.minimum(segment, last_segment)])
+            if crossing.any():
+                junction_error |= crossing & (junction_count != segment + 1)
+                overshoot = along - tracks["lengths"][rows, np.minimum(segment, last_segment)]
+                direction = tracks["route"][rows, np.minimum(segment, last_segment)]
+                to_left = crossing & (direction == DIRECTION_CODES["LEFT"])
+                to_right = crossing & (direction == DIRECTION_CODES["RIGHT"])
+                straight = crossing & ~to_left & ~to_right
+                along = np.select([to_left, to_right, straight], [-offset, offset, overshoot], along)
+                offset = np.select([to_left, to_right], [overshoot, -overshoot], offset)
+                heading = np.select([to_left, to_right], [heading + np.pi / 2, heading - np.pi / 2], heading)
+                segment += crossing
+                done |= junction_error | (segment >= tracks["route_len"])
+
+        crashed |= ~done & (np.abs(offset) > SIM_OFF_TRACK_DISTANCE)
+        done |= crashed
+
+    arrived_right = arrived & (segment == tracks["route_len"] - 1) & ~junction_error
+    results = {
+        "success": arrived_right,
+        "arrived": arrived,
+        "crashed": crashed,
+        "junction_error": junction_error | (arrived & ~arrived_right),
+        "timeout": ~done,
+        "lap_time": np.where(arrived_right, lap_time, np.nan),
+        "lost_episodes": lost_episodes,
+        "lost_time": lost_steps * dt,
+    }
+    if trace:
+        results["left_speed"] = np.array(left_trace).reshape(-1, n)
+        results["right_speed"] = np.array(right_trace).reshape(-1, n)
+    return results
+
+
+def summarize(results, mask=None):
+    """
+    Aggregate per-robot results
+
+    Args:
+        results (dict): Result arrays from simulate
+        mask (np.ndarray): Optional boolean selection of robots
+
+    Returns:
+        dict: Success rate, lap time and LOST frequency statistics
+    """
+    if mask is not None:
+        results = {name: values[mask] for name, values in results.items()}
+    runs = len(results["success"])
+    lap_times = results["lap_time"][results["success"]]
+    return {
+        "runs": runs,
+        "success_rate": float(results["success"].mean()) if runs else 0.0,
+        "crash_rate": float(results["crashed"].mean()) if runs else 0.0,
+        "junction_error_rate": float(results["junction_error"].mean()) if runs else 0.0,
+        "timeout_rate": float(results["timeout"].mean()) if runs else 0.0,
+        "mean_lap_time": float(lap_times.mean()) if len(lap_times) else None,
+        "median_lap_time": float(np.median(lap_times)) if len(lap_times) else None,
+        "lost_per_run": float(results["lost_episodes"].mean()) if runs else 0.0,
+        "lost_run_rate": float((results["lost_episodes"] > 0).mean()) if runs else 0.0,
+    }
+
+
+def sweep(name, values, runs_per_value=1000, junctions=3, rng=None, profile=False, **fixed):
+    """
+    Sweep one parameter over a batch of random tracks
+
+    Every value is simulated on runs_per_value robots, all stepped together.
+    With profile set, every segment has a learned distance, so the speed
+    profiler runs on the whole route.
+
+    Returns:
+        list: (value, summary) tuples in the order of values
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    values = np.asarray(values, dtype=float)
+    n = len(values) * runs_per_value
+    group = np.repeat(np.arange(len(values)), runs_per_value)
+    params = make_params(n, **dict(fixed, **{name: values[group]}))
+    tracks = random_tracks(n, junctions, rng)
+    if profile:
+        tracks["distances"] = learned_distances(tracks, params["base_speed"])
+    results = simulate(params, tracks, rng)
+    return [(float(value), summarize(results, group == index)) for index, value in enumerate(values)]
+
+
+def controller_trace(readings, route, distances=None, dt=LOOP_DELAY):
+    """
+    Run a reading sequence through the controller classes like LineFollower.run
+
+    The clock is replaced by step * dt, so timers behave as in simulate.
+
+    Args:
+        readings (np.ndarray): Binary readings of shape (steps, 5)
+        route (list): Route plan such as ["RIGHT", "LEFT"]
+        distances (list): Expected distance (or None) of each segment for the speed profiler
+        dt (float): Control loop period in seconds
+
+    Returns:
+        tuple: Motor speeds of shape (steps, 2) up to the arrival step, and the arrival step or None
+    """
+    clock = [0.0]
+    with mock.patch("time.time", lambda: clock[0]):
+        sensor_manager = SensorManager(None)
+        state_manager = StateManager()
+        pid_controller = PIDController()
+        junction_handler = JunctionHandler()
+        recovery_handler = RecoveryHandler()
+        speed_profiler = SpeedProfiler()
+        junction_handler.set_route(route)
+        speed_profiler.start_route(route, distances)
+
+        speeds = []
+        for step, reading in enumerate(readings):
+            clock[0] = step * dt
+            sensor_manager.sensor_values = {f'sensor_{i}': SIM_WHITE_LEVEL if value else SIM_BLACK_LEVEL
+                                            for i, value in enumerate(reading)}
+            sensor_readings = sensor_manager.read_sensors()
+            current_state = state_manager.update_state(sensor_readings, sensor_manager,
+                                                       junction_handler, recovery_handler)
+
+            left_speed, right_speed = 0, 0
+            if current_state == STATE_LINE_FOLLOWING:
+                left_speed, right_speed = pid_controller.calculate(sensor_readings)
+                left_speed, right_speed = speed_profiler.apply(left_speed, right_speed)
+            elif current_state == STATE_JUNCTION:
+                if not junction_handler.handled_current_junction:
+                    junction_handler.handled_current_junction = True
+                    left_speed, right_speed = junction_handler.handle_junction()
+                    junction_handler.current_turn_speeds = (left_speed, right_speed)
+                    speed_profiler.on_junction()
+                    if junction_handler.junction_count >= len(junction_handler.current_route):
+                        return np.array(speeds).reshape(-1, 2), step
+                else:
+                    left_speed, right_speed = junction_handler.current_turn_speeds
+            elif current_state == STATE_LOST:
+                speed_profiler.mark_lost()
+                left_speed, right_speed = recovery_handler.handle_lost_line(sensor_manager.last_valid_pattern)
+
+            # MotorController.set_motor_speed
+            speeds.append((max(0, min(1, left_speed)), max(0, min(1, right_speed))))
+    return np.array(speeds).reshape(-1, 2), None
+
+
+def scripted_readings(segment_steps, lost=None, rng=None, junction_steps=4):
+    """
+    Reading sequence of a route with a wandering line, junctions and LOST episodes
+
+    Args:
+        segment_steps (list): Loop steps spent on each segment before its junction
+        lost (dict): Segment index to (first step, steps) with every sensor on white
+        rng (np.random.Generator): Random source for the line position
+        junction_steps (int): Loop steps with every sensor on black at each junction
+
+    Returns:
+        np.ndarray: Binary readings of shape (steps, 5)
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    lost = lost or {}
+    position = 0.0
+    readings = []
+    for index, steps in enumerate(segment_steps):
+        for step in range(steps):
+            position = float(np.clip(position + rng.normal(0.0, 0.3), -2.0, 2.0))
+            reading = (np.abs(SENSOR_WEIGHTS - position) >= 0.75).astype(float)
+            first, length = lost.get(index, (steps, 0))
+            readings.append(np.ones(5) if first <= step < first + length else reading)
+        readings.extend(np.zeros(5) for _ in range(junction_steps))
+    return np.array(readings)
+
+
+def check_controller(rng=None, tolerance=1e-9):
+    """
+    Check that simulate with n=1 drives like the controller classes
+
+    Feeds the same reading sequence, covering speed profiled segments, LOST
+    episodes, a junction seen again within the cooldown and every turn
+    direction, to controller_trace and to simulate.
+
+    Returns:
+        bool: True when the motor speeds of every step and the arrival step match
+    """
+    route = ["RIGHT", "STRAIGHT", "LEFT", "STRAIGHT"]
+    distances = [4.0, None, 5.0, 2.0]
+    readings = scripted_readings([90, 36, 60, 120, 70], {2: (20, 6), 3: (30, 12)}, rng)
+
+    logging.disable(logging.INFO)
+    try:
+        expected, arrival = controller_trace(readings, route, distances)
+        tracks = route_track(route, np.ones(len(route)))
+        tracks["distances"] = np.array([[np.nan if d is None else d for d in distances]])
+        results = simulate(make_params(1), tracks, rng, sensor_readings=readings[:, None, :], trace=True)
+    finally:
+        logging.disable(logging.NOTSET)
+
+    if arrival is None or not results["arrived"][0]:
+        logging.error(f"Route not completed: classes arrived at {arrival}, simulate arrived={results['arrived'][0]}")
+        return False
+    simulated = np.column_stack((results["left_speed"][:arrival, 0], results["right_speed"][:arrival, 0]))
+    mismatch = np.flatnonzero(np.abs(simulated - expected).max(axis=1) > tolerance)
+    if len(mismatch):
+        step = mismatch[0]
+        logging.error(f"Simulator diverges at step {step}: classes {expected[step]}, simulate {simulated[step]}")
+        return False
+    if results["left_speed"][arrival, 0] or results["right_speed"][arrival, 0]:
+        logging.error(f"Simulator did not arrive at step {arrival}")
+        return False
+    logging.info(f"Simulator matches the controller classes for {arrival} steps")
+    return True
+
+
+def main():
+    """Command line entry point for batch simulations"""
+    parser = argparse.ArgumentParser(description="Monte Carlo simulation of the line follower controller")
+    parser.add_argument("--runs", type=int, default=1000, help="robots per parameter value")
+    parser.add_argument("--junctions", type=int, default=3, help="junctions per route")
+    parser.add_argument("--seed", type=int, default=None, help="random seed")
+    parser.add_argument("--sweep", default="noise", choices=sorted(PARAMETER_DEFAULTS),
+                        help="parameter to sweep")
+    parser.add_argument("--values", type=float, nargs="+", default=[0.0, 0.1, 0.2, 0.3],
+                        help="values of the swept parameter")
+    parser.add_argument("--profile", action="store_true",
+                        help="give every segment a learned distance so the speed profiler runs")
+    parser.add_argument("--check", action="store_true",
+                        help="only check the simulator against the controller classes")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if args.check:
+        sys.exit(0 if check_controller(np.random.default_rng(args.seed)) else 1)
+
+    start = time.time()
+    summaries = sweep(args.sweep, args.values, args.runs, args.junctions, np.random.default_rng(args.seed),
+                      args.profile)
+    logging.info(f"Simulated {args.runs * len(args.values)} robots in {time.time() - start:.2f}s")
+
+    for value, summary in summaries:
+        lap = summary["mean_lap_time"]
+        lap_str = f"{lap:.2f}s" if lap is not None else "n/a"
+        logging.info(f"{args.sweep}={value:g}: success={summary['success_rate']:.1%}, lap={lap_str}, "
+                     f"LOST/run={summary['lost_per_run']:.2f}, crash={summary['crash_rate']:.1%}, "
+                     f"junction errors={summary['junction_error_rate']:.1%}, "
+                     f"timeout={summary['timeout_rate']:.1%}")
+
+
+if __name__ == "__main__":
+    main()
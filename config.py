@@ -22,6 +22,18 @@ JUNCTION_TURN_FACTOR = 1.4
 MIN_BLACK_SENSORS_JUNCTION = 3
 JUNCTION_COOLDOWN_TIME = 2.0  # Time to prevent repeated junction detection
 
+# Speed profile parameters (distances in seconds of travel at BASE_SPEED)
+SPEED_PROFILE_MAX_SPEED = 0.22      # Top speed on long, clear segments
+SPEED_PROFILE_RAMP_TIME = 0.8       # Distance over which to accelerate and decelerate
+SPEED_PROFILE_BRAKE_TIME = 2.5      # Distance before an expected junction to be back at BASE_SPEED
+SPEED_PROFILE_MIN_SEGMENT_TIME = 3.0  # Shorter segments are always driven at BASE_SPEED
+SPEED_PROFILE_MIN_SAMPLES = 2       # Clean traversals needed before a segment is trusted
+SPEED_PROFILE_LOST_MEMORY = 5       # Clean traversals needed since the last LOST on a segment
+SPEED_PROFILE_MAX_LOST_RATE = 0.1   # Segments losing the line more often are never sped up
+
+# Learned floor map with segment and route travel times
+FLOOR_MAP_FILE = "floor_map.json"
+
 
 # Default route plan (will be overridden by database route)
 ROUTE_PLAN = ["RIGHT","LEFT"]
@@ -29,6 +41,16 @@ ROUTE_PLAN = ["RIGHT","LEFT"]
 # Main loop timing
 LOOP_DELAY = 0.05
 
+# --- Split Process Mode ---
+# Run the board and control loop in a separate real-time process that talks
+# to the table service, database and logging over shared memory
+SPLIT_PROCESS_MODE = False
+MAX_ROUTE_STEPS = 32             # Longest route the shared-memory channel can hold
+REALTIME_LOG_LEVEL = "WARNING"   # Log level inside the real-time process
+REALTIME_START_TIMEOUT = 10.0    # Seconds to wait for the real-time process to set up
+SERVICE_POLL_INTERVAL = 0.02     # Seconds between status reads in the service process
+STATUS_READ_ATTEMPTS = 1000      # Tries for a consistent status snapshot before giving up for a poll
+
 # --- Database Settings ---
 DB_HOST = "localhost"
 DB_USER = "root"
@@ -48,3 +70,15 @@ TABLE_PAUSE_TIME = 3.0     # Time to pause at a table in seconds
 TABLES_TO_VISIT = ["1", "2"]  # Default tables if database connection fails
 # Filter for specific tables (empty list means visit all tables)
 TABLES_FILTER = [1]  # Add table IDs here to filter, e.g. ["1", "4", "6"]
+
+# --- Batch Simulator Settings ---
+SIM_MAX_WHEEL_SPEED = 0.6      # Wheel speed in m/s at a motor command of 1.0
+SIM_WHEEL_BASE = 0.12          # Distance between the wheels in meters
+SIM_SENSOR_OFFSET = 0.08       # Distance from the wheel axle forward to the sensor row in meters
+SIM_SENSOR_SPACING = 0.012     # Lateral distance between neighbouring sensors in meters
+SIM_LINE_HALF_WIDTH = 0.009    # Half the width of the tape line in meters
+SIM_JUNCTION_HALF_WIDTH = 0.01  # Half the width of a junction cross line in meters
+SIM_BLACK_LEVEL = 0.1          # Analog reading over the line
+SIM_WHITE_LEVEL = 0.9          # Analog reading over the floor
+SIM_OFF_TRACK_DISTANCE = 0.15  # Distance from the line at which a robot counts as crashed
+SIM_MAX_TIME = 60.0            # Simulated seconds before a run counts as failed
@@ -0,0 +1,235 @@
+"""Learned floor map with travel times between junctions and tables"""
+import json
+import logging
+import os
+import time
+from config import FLOOR_MAP_FILE
+
+
+def update_stats(stats, value):
+    """Add a sample to running statistics (Welford's algorithm)"""
+    stats = stats or {"count": 0, "mean": 0.0, "m2": 0.0, "min": None}
+    stats["count"] += 1
+    delta = value - stats["mean"]
+    stats["mean"] += delta / stats["count"]
+    stats["m2"] += delta * (value - stats["mean"])
+    stats["min"] = value if stats["min"] is None else min(stats["min"], value)
+    return stats
+
+
+class FloorMap:
+    """Records segment and route travel times and predicts ETAs"""
+
+    def __init__(self, path=FLOOR_MAP_FILE):
+        self.path = path
+        self.segments = {}
+        self.routes = {}
+        self.plans = {}
+        self.route = []
+        self.origin = None
+        self.destination = None
+        self.segment_index = 0
+        self.route_start = None
+        self.segment_start = None
+        self.segment_lost = False
+        self.lost_count = 0
+
+    @staticmethod
+    def pair_key(origin, destination):
+        """Key identifying a pair of tables"""
+        return f"{origin}>{destination}"
+
+    @staticmethod
+    def route_key(origin, destination, route):
+        """
+        Key identifying a route between two tables
+
+        The direction sequence is part of the key, so times measured on a
+        different layout between the same tables are never mixed in.
+        """
+        return f"{origin}>{destination}:{''.join(step[0] for step in route)}"
+
+    @staticmethod
+    def segment_key(origin, destination, route, index):
+        """Key identifying a segment of a route"""
+        return f"{FloorMap.route_key(origin, destination, route)}>{index}"
+
+    def load(self):
+        """Load the floor map from disk"""
+        if not os.path.exists(self.path):
+            logging.info(f"No floor map at {self.path}, starting empty")
+            return False
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            self.segments = data.get("segments", {})
+            self.routes = data.get("routes", {})
+            self.plans = data.get("plans", {})
+            logging.info(f"Loaded floor map: {len(self.routes)} routes, {len(self.segments)} segments")
+            return True
+        except (OSError, ValueError) as e:
+            logging.error(f"Error loading floor map: {e}")
+            return False
+
+    def save(self):
+        """Write the floor map to disk"""
+        try:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"segments": self.segments, "routes": self.routes, "plans": self.plans}, f, indent=2)
+            os.replace(tmp_path, self.path)
+            return True
+        except OSError as e:
+            logging.error(f"Error saving floor map: {e}")
+            return False
+
+    def start_route(self, route, origin, destination, timestamp=None):
+        """Start timing a new route, at timestamp if given"""
+        self.route = list(route) if route else []
+        self.origin = str(origin)
+        self.destination = str(destination)
+        self.plans[self.pair_key(self.origin, self.destination)] = self.route
+        self.segment_index = 0
+        self.route_start = time.time() if timestamp is None else timestamp
+        self.segment_start = self.route_start
+        self.segment_lost = False
+        self.lost_count = 0
+
+    def cancel_route(self):
+        """Stop recording, e.g. while driving a fallback plan that belongs to no table pair"""
+        self.route_start = None
+
+    def mark_lost(self):
+        """Record the start of a LOST episode"""
+        self.lost_count += 1
+        self.segment_lost = True
+
+    def on_junction(self, distance=None, timestamp=None):
+        """
+        Record the segment that ends at the junction just reached
+
+        Args:
+            distance (float): Segment length in seconds of travel at BASE_SPEED,
+                only given when the segment was driven without losing the line
+            timestamp (float): Time the junction was reached, defaults to now
+        """
+        if self.route_start is None:
+            return
+        now = time.time() if timestamp is None else timestamp
+        key = self.segment_key(self.origin, self.destination, self.route, self.segment_index)
+        segment = self.segments.setdefault(key, {"duration": None, "distance": None, "lost": 0, "clean_streak": 0})
+        segment["duration"] = update_stats(segment["duration"], now - self.segment_start)
+        if self.segment_lost:
+            segment["lost"] += 1
+            segment["clean_streak"] = 0
+        else:
+            segment["clean_streak"] = segment.get("clean_streak", 0) + 1
+            if distance is not None:
+                segment["distance"] = update_stats(segment["distance"], distance)
+        logging.info(f"Floor map: segment {key} took {now - self.segment_start:.2f}s")
+
+        self.segment_index += 1
+        self.segment_start = now
+        self.segment_lost = False
+
+    def finish_route(self, timestamp=None):
+        """Record the total duration of the current route and save the map"""
+        if self.route_start is None:
+            return
+        duration = (time.time() if timestamp is None else timestamp) - self.route_start
+        key = self.route_key(self.origin, self.destination, self.route)
+        route = self.routes.setdefault(key, {"duration": None, "lost": 0})
+        route["duration"] = update_stats(route["duration"], duration)
+        route["lost"] += self.lost_count
+        logging.info(f"Floor map: route {key} took {duration:.2f}s with {self.lost_count} LOST episodes")
+        self.route_start = None
+        self.save()
+
+    def segment_history(self, origin, destination, route, index):
+        """
+        Driving history of a segment
+
+        Returns:
+            dict: Shortest clean "distance" (None when never driven clean), clean
+                distance "samples", "traversals", "lost" traversals and the
+                "clean_streak" since the last LOST, or None if never driven
+        """
+        segment = self.segments.get(self.segment_key(origin, destination, route, index))
+        if not segment or not segment["duration"]:
+            return None
+        return {
+            "distance": segment["distance"]["min"] if segment["distance"] else None,
+            "samples": segment["distance"]["count"] if segment["distance"] else 0,
+            "traversals": segment["duration"]["count"],
+            "lost": segment["lost"],
+            "clean_streak": segment.get("clean_streak", 0),
+        }
+
+    def route_cost(self, origin, destination, route=None):
+        """
+        Measured travel time of a route, usable as a cost for route planning
+
+        Args:
+            route (list): Direction sequence, defaults to the plan last driven between the tables
+
+        Returns:
+            float: Mean duration of completed runs in seconds, or None if unknown
+        """
+        route = self.plans.get(self.pair_key(origin, destination)) if route is None else route
+        if route is None:
+            return None
+        stats = self.routes.get(self.route_key(origin, destination, route))
+        if stats and stats["duration"]:
+            return stats["duration"]["mean"]
+        return None
+
+    def segments_cost(self, origin, destination, route, start_index, end_index):
+        """Sum of mean segment durations, or None if any segment is unknown"""
+        total = 0.0
+        for index in range(start_index, end_index):
+            segment = self.segments.get(self.segment_key(origin, destination, route, index))
+            if not segment or not segment["duration"]:
+                return None
+            total += segment["duration"]["mean"]
+        return total
+
+    def estimate_eta(self, origin, destination):
+        """
+        Predicted travel time from origin to destination
+
+        Uses the mean of completed runs of the plan last driven between the
+        tables, falling back to the sum of its segment means when the route
+        was never completed.
+
+        Returns:
+            float: Expected travel time in seconds, or None if unknown
+        """
+        route = self.plans.get(self.pair_key(origin, destination))
+        if route is None:
+            return None
+        cost = self.route_cost(origin, destination, route)
+        if cost is None:
+            cost = self.segments_cost(origin, destination, route, 0, len(route))
+        return cost
+
+    def remaining_time(self):
+        """
+        Predicted time until the current route finishes
+
+        Uses the remaining segment means, falling back to the mean route
+        duration minus the time driven so far when a segment is unknown.
+
+        Returns:
+            float: Seconds until arrival, or None if no route is in progress or it is unknown
+        """
+        if self.route_start is None:
+            return None
+        now = time.time()
+        remaining = self.segments_cost(self.origin, self.destination, self.route,
+                                       self.segment_index, len(self.route))
+        if remaining is not None:
+            return max(0.0, remaining - (now - self.segment_start))
+        cost = self.route_cost(self.origin, self.destination, self.route)
+        if cost is None:
+            return None
+        return max(0.0, cost - (now - self.route_start))
@@ -9,9 +9,11 @@ from motors import MotorController
 from pid_controller import PIDController
 from junction_handler import JunctionHandler
 from recovery_handler import RecoveryHandler
+from speed_profiler import SpeedProfiler, expected_distances
 from state_manager import StateManager, STATE_LINE_FOLLOWING, STATE_JUNCTION, STATE_LOST, STATE_FINISHED
 from database_handler import DatabaseHandler
 from table_service import TableService
+from floor_map import FloorMap
 
 class LineFollower:
     """Main class that coordinates the robot's components"""
@@ -24,9 +26,11 @@ class LineFollower:
         self.pid_controller = None
         self.junction_handler = None
         self.recovery_handler = None
+        self.speed_profiler = None
         self.state_manager = None
         self.db_handler = None
         self.table_service = None
+        self.floor_map = None
         
     def setup(self):
         """Initialize the robot and its components"""
@@ -47,6 +51,9 @@ class LineFollower:
             self.junction_handler = JunctionHandler()
             self.recovery_handler = RecoveryHandler()
             self.state_manager = StateManager()
+            self.floor_map = FloorMap()
+            self.floor_map.load()
+            self.speed_profiler = SpeedProfiler()
             
             # Initialize database and table service
             self.db_handler = DatabaseHandler(
@@ -55,7 +62,7 @@ class LineFollower:
                 password=DB_PASSWORD,
                 database=DB_NAME
             )
-            self.table_service = TableService(self.db_handler)
+            self.table_service = TableService(self.db_handler, self.floor_map)
             
             # Setup components
             sensor_setup_ok = self.sensor_manager.setup()
@@ -66,9 +73,9 @@ class LineFollower:
                 self.table_service.load_tables()
                 initial_route = self.table_service.get_route_to_next_table()
                 if initial_route:
-                    self.junction_handler.set_route(initial_route)
+                    self.set_route(initial_route)
                 else:
-                    self.junction_handler.set_route(ROUTE_PLAN)  # Use default if no route found
+                    self.set_route(ROUTE_PLAN, learn=False)  # Use default if no route found
                 
                 logging.info("Setup complete. Ready to start.")
                 return True
@@ -79,6 +86,24 @@ class LineFollower:
         except Exception as e:
             logging.error(f"Setup failed: {e}")
             return False
+
+    def set_route(self, route, learn=True):
+        """
+        Set a new route on the junction handler, speed profiler and floor map
+
+        Args:
+            route (list): Directions to take at each junction
+            learn (bool): False for the fallback plan, which belongs to no table pair
+        """
+        origin = self.table_service.route_origin
+        destination = self.table_service.current_destination
+        self.junction_handler.set_route(route)
+        if learn:
+            self.speed_profiler.start_route(route, expected_distances(self.floor_map, route, origin, destination))
+            self.floor_map.start_route(route, origin, destination)
+        else:
+            self.speed_profiler.start_route(route)
+            self.floor_map.cancel_route()
             
     def run(self):
         """Main control loop"""
@@ -105,28 +130,32 @@ class LineFollower:
                 left_speed, right_speed = 0, 0
                 if current_state == STATE_LINE_FOLLOWING:
                     left_speed, right_speed = self.pid_controller.calculate(sensor_readings)
+                    left_speed, right_speed = self.speed_profiler.apply(left_speed, right_speed)
                 elif current_state == STATE_JUNCTION:
                     if not self.junction_handler.handled_current_junction:
                         self.junction_handler.handled_current_junction = True
                         left_speed, right_speed = self.junction_handler.handle_junction(self.motor_controller)
                         self.junction_handler.current_turn_speeds = (left_speed, right_speed)
+                        self.floor_map.on_junction(self.speed_profiler.on_junction())
                         
                         # Check if we've completed the current route
                         if self.junction_handler.junction_count >= len(self.junction_handler.current_route):
                             # Pause at the table
                             self.motor_controller.stop()
+                            self.floor_map.finish_route()
                             logging.info(f"Arrived at table {self.table_service.current_destination}. Pausing for {TABLE_PAUSE_TIME} seconds.")
                             time.sleep(TABLE_PAUSE_TIME)
                             
                             # Get route to next table
                             next_route = self.table_service.get_route_to_next_table()
                             if next_route:
-                                self.junction_handler.set_route(next_route)
+                                self.set_route(next_route)
+                                self.table_service.get_schedule_etas()
                             else:
                                 # No more tables, return to kitchen
                                 return_route = self.table_service.return_to_kitchen()
                                 if return_route:
-                                    self.junction_handler.set_route(return_route)
+                                    self.set_route(return_route)
                                     logging.info("Returning to kitchen.")
                                 else:
                                     logging.info("No return route found. Stopping.")
@@ -135,6 +164,9 @@ class LineFollower:
                     else:
                         left_speed, right_speed = self.junction_handler.current_turn_speeds
                 elif current_state == STATE_LOST:
+                    self.speed_profiler.mark_lost()
+                    if self.state_manager.previous_state != STATE_LOST:
+                        self.floor_map.mark_lost()
                     left_speed, right_speed = self.recovery_handler.handle_lost_line(
                         self.sensor_manager.last_valid_pattern
                     )
@@ -165,4 +197,7 @@ class LineFollower:
             if self.board:
                 self.board.exit()
         except Exception as e:
-            logging.error(f"Error exiting board: {e}")
\ No newline at end of file
+            logging.error(f"Error exiting board: {e}")
+
+        if self.floor_map:
+            self.floor_map.save()
\ No newline at end of file
@@ -4,23 +4,26 @@ Main entry point for the application
 """
 import logging
 
+from config import SPLIT_PROCESS_MODE
 from line_follower import LineFollower
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('line_follower.log', mode='w'),
-        logging.StreamHandler()
-    ]
-)
+from split_runtime import SplitLineFollower
 
 def main():
     """Main entry point for the line follower robot application"""
+    # Configure logging here rather than at import, as the real-time process
+    # re-imports this module under the spawn and forkserver start methods
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('line_follower.log', mode='w'),
+            logging.StreamHandler()
+        ]
+    )
+
     try:
         # Create and setup the line follower robot
-        robot = LineFollower()
+        robot = SplitLineFollower() if SPLIT_PROCESS_MODE else LineFollower()
         if robot.setup():
             # Start the robot
             robot.run()
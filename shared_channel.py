@@ -0,0 +1,170 @@
+"""Shared-memory channel between the real-time control process and the service process"""
+import math
+import struct
+from multiprocessing import shared_memory
+
+from config import MAX_ROUTE_STEPS, STATUS_READ_ATTEMPTS
+from state_manager import STATE_LINE_FOLLOWING, STATE_JUNCTION, STATE_LOST, STATE_FINISHED
+
+# Integer codes used on the channel
+STATE_CODES = [STATE_LINE_FOLLOWING, STATE_JUNCTION, STATE_LOST, STATE_FINISHED]
+ROUTE_DIRECTIONS = ["STRAIGHT", "LEFT", "RIGHT"]
+
+# Phases of the real-time process
+PHASE_STARTING = 0
+PHASE_WAITING = 1
+PHASE_RUNNING = 2
+PHASE_FAILED = 3
+PHASE_STOPPED = 4
+
+# Every block starts with a sequence number: odd while the writer is busy
+SEQUENCE = struct.Struct("<I")
+
+# Real-time process -> service process, written every control loop
+STATUS = struct.Struct(
+    "<BB5B"                     # phase, state, sensor readings
+    "I3d"                       # loop count, timestamp, last and worst loop time
+    "2d"                        # left and right motor speed
+    "IdH"                       # route id, route start time, junction count
+    "Id"                        # arrived route id, arrival time
+    f"{MAX_ROUTE_STEPS}d"       # junction times of the current route
+    f"{MAX_ROUTE_STEPS}d"       # segment distances of the current route (NaN when not clear)
+    f"{MAX_ROUTE_STEPS}H"       # LOST episodes started on each segment of the current route
+)
+STATUS_FIELDS = ["phase", "state", "readings", "loop_count", "timestamp", "loop_time", "max_loop_time",
+                 "left_speed", "right_speed", "route_id", "route_start", "junction_count",
+                 "arrived_route_id", "arrival_time", "junction_times", "segment_distances", "segment_lost"]
+
+# Service process -> real-time process, written when a new route or command is sent
+ROUTE = struct.Struct(
+    "<IBH"                      # route id, stop flag, route length
+    f"{MAX_ROUTE_STEPS}B"       # direction codes
+    f"{MAX_ROUTE_STEPS}d"       # expected segment distances for the speed profiler (NaN when unknown)
+)
+
+STATUS_OFFSET = 0
+ROUTE_OFFSET = SEQUENCE.size + STATUS.size
+CHANNEL_SIZE = ROUTE_OFFSET + SEQUENCE.size + ROUTE.size
+
+
+class SharedChannel:
+    """
+    Fixed-layout shared memory with one status block and one route block
+
+    Each block has a single writer and is protected by a sequence lock.
+    Reads make a bounded number of attempts and report failure instead of
+    waiting, so a writer stopped halfway through a write never blocks the
+    reader, and nothing is pickled.
+    """
+
+    def __init__(self, name=None, create=False):
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=CHANNEL_SIZE if create else 0)
+        self.buf = self.shm.buf
+        if create:
+            self.buf[:CHANNEL_SIZE] = bytes(CHANNEL_SIZE)
+        self.status_seq = 0
+        self.route_seq = 0
+
+    @property
+    def name(self):
+        """Name used to attach to the channel from another process"""
+        return self.shm.name
+
+    def _write(self, offset, layout, seq, values):
+        """Write a block under its sequence lock and return the new sequence number"""
+        SEQUENCE.pack_into(self.buf, offset, seq + 1)
+        layout.pack_into(self.buf, offset + SEQUENCE.size, *values)
+        SEQUENCE.pack_into(self.buf, offset, seq + 2)
+        return seq + 2
+
+    def _read(self, offset, layout, attempts):
+        """
+        Read a consistent copy of a block
+
+        Returns:
+            tuple: (sequence number, values), or None when the writer was busy for every attempt
+        """
+        for _ in range(attempts):
+            before = SEQUENCE.unpack_from(self.buf, offset)[0]
+            if before % 2:
+                continue
+            values = layout.unpack_from(self.buf, offset + SEQUENCE.size)
+            if SEQUENCE.unpack_from(self.buf, offset)[0] == before:
+                return before, values
+        return None
+
+    def write_status(self, phase, state, readings, loop_count, timestamp, loop_time, max_loop_time,
+                     left_speed, right_speed, route_id, route_start, junction_count,
+                     arrived_route_id, arrival_time, junction_times, segment_distances, segment_lost):
+        """Publish the real-time process status"""
+        self.status_seq = self._write(STATUS_OFFSET, STATUS, self.status_seq, (
+            phase, state, *readings, loop_count, timestamp, loop_time, max_loop_time,
+            left_speed, right_speed, route_id, route_start, junction_count,
+            arrived_route_id, arrival_time, *junction_times, *segment_distances, *segment_lost
+        ))
+
+    def read_status(self, attempts=STATUS_READ_ATTEMPTS):
+        """
+        Read the latest real-time process status
+
+        Returns:
+            dict: Status fields, with state as a StateManager state name,
+                or None if no consistent snapshot could be read
+        """
+        result = self._read(STATUS_OFFSET, STATUS, attempts)
+        if result is None:
+            return None
+        values = result[1]
+        status = dict(zip(STATUS_FIELDS[:2], values[:2]))
+        status["state"] = STATE_CODES[status["state"]]
+        status["readings"] = list(values[2:7])
+        status.update(zip(STATUS_FIELDS[3:14], values[7:18]))
+        status["junction_times"] = values[18:18 + MAX_ROUTE_STEPS]
+        status["segment_distances"] = values[18 + MAX_ROUTE_STEPS:18 + 2 * MAX_ROUTE_STEPS]
+        status["segment_lost"] = values[18 + 2 * MAX_ROUTE_STEPS:]
+        return status
+
+    def write_route(self, route_id, route, distances=None, stop=False):
+        """Send a route with the expected distance (or None) of each segment, or a stop command"""
+        if len(route) > MAX_ROUTE_STEPS:
+            raise ValueError(f"Route has {len(route)} steps, the channel holds at most {MAX_ROUTE_STEPS}")
+        directions = [ROUTE_DIRECTIONS.index(step) for step in route]
+        directions += [0] * (MAX_ROUTE_STEPS - len(directions))
+        distances = [math.nan if d is None else d for d in (distances or [])]
+        distances += [math.nan] * (MAX_ROUTE_STEPS - len(distances))
+        self.route_seq = self._write(ROUTE_OFFSET, ROUTE, self.route_seq, (
+            route_id, stop, len(route), *directions, *distances
+        ))
+
+    def route_changed(self, last_seq):
+        """Cheap check whether a new route was written since last_seq"""
+        return SEQUENCE.unpack_from(self.buf, ROUTE_OFFSET)[0] != last_seq
+
+    def read_route(self, attempts=1):
+        """
+        Read the latest route
+
+        The real-time process makes a single attempt and retries on its next tick.
+
+        Returns:
+            tuple: (sequence number, route id, stop flag, route, distances),
+                or None while the service process is writing the block
+        """
+        result = self._read(ROUTE_OFFSET, ROUTE, attempts)
+        if result is None:
+            return None
+        seq, values = result
+        route_id, stop, length = values[:3]
+        route = [ROUTE_DIRECTIONS[code] for code in values[3:3 + length]]
+        start = 3 + MAX_ROUTE_STEPS
+        distances = [None if math.isnan(d) else d for d in values[start:start + length]]
+        return seq, route_id, bool(stop), route, distances
+
+    def close(self):
+        """Detach from the shared memory"""
+        self.buf = None
+        self.shm.close()
+
+    def unlink(self):
+        """Free the shared memory, called once by the process that created it"""
+        self.shm.unlink()
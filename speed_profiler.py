@@ -0,0 +1,117 @@
+"""Route-aware speed profiling for the line follower robot"""
+import logging
+import time
+from config import (BASE_SPEED, LOOP_DELAY, SPEED_PROFILE_MAX_SPEED, SPEED_PROFILE_RAMP_TIME,
+                    SPEED_PROFILE_BRAKE_TIME, SPEED_PROFILE_MIN_SEGMENT_TIME, SPEED_PROFILE_MIN_SAMPLES,
+                    SPEED_PROFILE_LOST_MEMORY, SPEED_PROFILE_MAX_LOST_RATE)
+
+
+def trusted_distance(history):
+    """
+    Expected distance of a segment that is known to be clear
+
+    A segment is trusted once it has enough clean samples, no LOST in its
+    recent traversals and a low overall LOST rate. Distances are measured in
+    seconds of travel at BASE_SPEED, so they stay valid no matter how fast
+    the segment was actually driven.
+
+    Args:
+        history (dict): Segment history from FloorMap.segment_history
+
+    Returns:
+        float: Shortest clean distance, or None when the segment is not trusted
+    """
+    if not history or history["samples"] < SPEED_PROFILE_MIN_SAMPLES:
+        return None
+    if history["lost"] and history["clean_streak"] < SPEED_PROFILE_LOST_MEMORY:
+        return None
+    if history["lost"] / history["traversals"] > SPEED_PROFILE_MAX_LOST_RATE:
+        return None
+    return history["distance"]
+
+
+def expected_distances(floor_map, route, origin, destination):
+    """Trusted distance, or None, for every segment of a route"""
+    return [trusted_distance(floor_map.segment_history(origin, destination, route, index))
+            for index in range(len(route))]
+
+
+class SpeedProfiler:
+    """Raises PID output to speed up on known long segments and slow down before junctions"""
+
+    def __init__(self):
+        self.route = []
+        self.distances = []
+        self.segment_index = 0
+        self.segment_progress = 0.0
+        self.segment_clean = True
+        self.last_update = None
+
+    def start_route(self, route, distances=None):
+        """Start profiling a new route with the expected distance (or None) of each segment"""
+        self.route = route if route else []
+        self.distances = list(distances) if distances else [None] * len(self.route)
+        self.segment_index = 0
+        self.reset_segment()
+
+    def reset_segment(self):
+        """Reset progress tracking for the current segment"""
+        self.segment_progress = 0.0
+        self.segment_clean = True
+        self.last_update = None
+
+    def target_speed(self):
+        """Calculate the target cruising speed for the current position"""
+        if not self.segment_clean or self.segment_index >= len(self.route):
+            return BASE_SPEED
+
+        expected = self.distances[self.segment_index] if self.segment_index < len(self.distances) else None
+        if expected is None or expected < SPEED_PROFILE_MIN_SEGMENT_TIME:
+            return BASE_SPEED
+
+        remaining = expected - self.segment_progress - SPEED_PROFILE_BRAKE_TIME
+        if remaining <= 0:
+            return BASE_SPEED
+
+        ramp = min(1.0, self.segment_progress / SPEED_PROFILE_RAMP_TIME,
+                   remaining / SPEED_PROFILE_RAMP_TIME)
+        return BASE_SPEED + (SPEED_PROFILE_MAX_SPEED - BASE_SPEED) * ramp
+
+    def apply(self, left_speed, right_speed):
+        """
+        Shift the PID motor speeds up to the profiled target speed
+
+        Both wheels get the same increase, so the steering correction keeps
+        the gain the PID was tuned for at BASE_SPEED.
+        """
+        now = time.time()
+        dt = 0.0 if self.last_update is None else min(now - self.last_update, LOOP_DELAY * 4)
+        self.last_update = now
+
+        speed = self.target_speed()
+        self.segment_progress += dt * speed / BASE_SPEED
+
+        if speed == BASE_SPEED:
+            return left_speed, right_speed
+
+        boost = speed - BASE_SPEED
+        logging.info(f"Speed profile: target={speed:.3f}, progress={self.segment_progress:.2f}")
+        return min(1.0, left_speed + boost), min(1.0, right_speed + boost)
+
+    def mark_lost(self):
+        """Drop back to BASE_SPEED for the rest of a segment on which the line was lost"""
+        if self.segment_clean:
+            logging.info(f"Speed profile: segment {self.segment_index} no longer clear")
+        self.segment_clean = False
+
+    def on_junction(self):
+        """
+        Finish the current segment and move on to the next one
+
+        Returns:
+            float: Distance driven on the finished segment, or None if it was not clear
+        """
+        distance = self.segment_progress if self.segment_clean and self.segment_progress > 0 else None
+        self.segment_index += 1
+        self.reset_segment()
+        return distance
@@ -0,0 +1,459 @@
+"""
+Split process runtime for the line follower robot
+
+A small real-time process owns the board and runs the control loop. The
+service process runs the table service, database, floor map and logging.
+They only exchange fixed-size sensor snapshots, routes and status over a
+SharedChannel, so a slow query or log flush never delays the control loop.
+"""
+import logging
+import math
+import multiprocessing
+import os
+import time
+from logging.handlers import QueueHandler, QueueListener
+from pyfirmata2 import Arduino, util
+
+from config import (LOOP_DELAY, TABLE_PAUSE_TIME, ROUTE_PLAN, DB_HOST, DB_USER, DB_PASSWORD, DB_NAME,
+                    MAX_ROUTE_STEPS, REALTIME_LOG_LEVEL, REALTIME_START_TIMEOUT, SERVICE_POLL_INTERVAL)
+from sensors import SensorManager
+from motors import MotorController
+from pid_controller import PIDController
+from junction_handler import JunctionHandler
+from recovery_handler import RecoveryHandler
+from speed_profiler import SpeedProfiler, expected_distances
+from state_manager import StateManager, STATE_LINE_FOLLOWING, STATE_JUNCTION, STATE_LOST, STATE_FINISHED
+from database_handler import DatabaseHandler
+from table_service import TableService
+from floor_map import FloorMap
+from shared_channel import (SharedChannel, STATE_CODES, PHASE_STARTING, PHASE_WAITING, PHASE_RUNNING,
+                            PHASE_FAILED, PHASE_STOPPED)
+
+
+def realtime_main(channel_name, log_queue):
+    """Entry point of the real-time process"""
+    root = logging.getLogger()
+    root.handlers = [QueueHandler(log_queue)]
+    root.setLevel(REALTIME_LOG_LEVEL)
+
+    controller = RealtimeController(SharedChannel(channel_name))
+    try:
+        if controller.setup():
+            controller.run()
+    finally:
+        controller.cleanup()
+
+
+class RealtimeController:
+    """Runs the sensor to motor control loop in the real-time process"""
+
+    def __init__(self, channel):
+        self.channel = channel
+        self.parent_pid = os.getppid()
+        self.board = None
+        self.iterator = None
+        self.sensor_manager = None
+        self.motor_controller = None
+        self.pid_controller = None
+        self.junction_handler = None
+        self.recovery_handler = None
+        self.state_manager = None
+        self.speed_profiler = None
+
+        self.phase = PHASE_STARTING
+        self.current_state = STATE_LINE_FOLLOWING
+        self.readings = [1, 1, 1, 1, 1]
+        self.left_speed = 0.0
+        self.right_speed = 0.0
+        self.loop_count = 0
+        self.loop_time = 0.0
+        self.max_loop_time = 0.0
+
+        self.route_seq = 0
+        self.route_id = 0
+        self.route_start = 0.0
+        self.junction_times = [0.0] * MAX_ROUTE_STEPS
+        self.segment_distances = [math.nan] * MAX_ROUTE_STEPS
+        self.segment_lost = [0] * MAX_ROUTE_STEPS
+        self.arrived_route_id = 0
+        self.arrival_time = 0.0
+        self.pause_until = 0.0
+
+    def setup(self):
+        """Initialize the board and control components"""
+        try:
+            self.board = Arduino(Arduino.AUTODETECT)
+            self.iterator = util.Iterator(self.board)
+            self.iterator.start()
+            time.sleep(1)
+
+            self.sensor_manager = SensorManager(self.board)
+            self.motor_controller = MotorController(self.board)
+            self.pid_controller = PIDController()
+            self.junction_handler = JunctionHandler()
+            self.recovery_handler = RecoveryHandler()
+            self.state_manager = StateManager()
+            self.speed_profiler = SpeedProfiler()
+
+            if self.sensor_manager.setup() and self.motor_controller.setup():
+                self.phase = PHASE_WAITING
+                self.publish()
+                return True
+            logging.error("Real-time setup failed.")
+        except Exception as e:
+            logging.error(f"Real-time setup failed: {e}")
+
+        self.phase = PHASE_FAILED
+        self.publish()
+        return False
+
+    def publish(self):
+        """Write the current status to the shared channel"""
+        self.channel.write_status(
+            self.phase, STATE_CODES.index(self.current_state), self.readings,
+            self.loop_count, time.time(), self.loop_time, self.max_loop_time,
+            self.left_speed, self.right_speed,
+            self.route_id, self.route_start, self.junction_handler.junction_count if self.junction_handler else 0,
+            self.arrived_route_id, self.arrival_time,
+            self.junction_times, self.segment_distances, self.segment_lost
+        )
+
+    def apply_route(self):
+        """
+        Take over the route most recently written by the service process,
+        once the pause at the current table is over
+
+        Returns:
+            bool: False when the service process asked to stop
+        """
+        result = self.channel.read_route()
+        if result is None:
+            return True
+        seq, route_id, stop, route, distances = result
+        if stop:
+            return False
+        if time.time() < self.pause_until:
+            return True
+        self.route_seq = seq
+
+        self.junction_handler.set_route(route)
+        self.speed_profiler.start_route(route, distances)
+        self.route_id = route_id
+        self.route_start = time.time()
+        self.junction_times = [0.0] * MAX_ROUTE_STEPS
+        self.segment_distances = [math.nan] * MAX_ROUTE_STEPS
+        self.segment_lost = [0] * MAX_ROUTE_STEPS
+        self.phase = PHASE_RUNNING
+        return True
+
+    def run(self):
+        """Fixed-rate control loop"""
+        next_tick = time.perf_counter()
+        while os.getppid() == self.parent_pid:
+            tick_start = time.perf_counter()
+
+            if self.channel.route_changed(self.route_seq):
+                if not self.apply_route():
+                    break
+
+            if self.phase == PHASE_RUNNING:
+                self.step()
+            else:
+                self.readings = self.sensor_manager.read_sensors()
+
+            self.loop_count += 1
+            self.loop_time = time.perf_counter() - tick_start
+            self.max_loop_time = max(self.max_loop_time, self.loop_time)
+            self.publish()
+
+            next_tick += LOOP_DELAY
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_tick = time.perf_counter()
+        else:
+            logging.error("Service process is gone. Stopping.")
+
+    def step(self):
+        """One iteration of the control loop, mirroring LineFollower.run"""
+        self.readings = self.sensor_manager.read_sensors()
+        self.current_state = self.state_manager.update_state(
+            self.readings,
+            self.sensor_manager,
+            self.junction_handler,
+            self.recovery_handler
+        )
+
+        left_speed, right_speed = 0, 0
+        if self.current_state == STATE_LINE_FOLLOWING:
+            left_speed, right_speed = self.pid_controller.calculate(self.readings)
+            left_speed, right_speed = self.speed_profiler.apply(left_speed, right_speed)
+        elif self.current_state == STATE_JUNCTION:
+            if not self.junction_handler.handled_current_junction:
+                self.junction_handler.handled_current_junction = True
+                left_speed, right_speed = self.junction_handler.handle_junction(self.motor_controller)
+                self.junction_handler.current_turn_speeds = (left_speed, right_speed)
+                self.record_junction()
+
+                if self.junction_handler.junction_count >= len(self.junction_handler.current_route):
+                    # Pause at the table while the service process sends the next route
+                    self.motor_controller.stop()
+                    self.left_speed, self.right_speed = 0, 0
+                    self.arrived_route_id = self.route_id
+                    self.arrival_time = time.time()
+                    self.pause_until = self.arrival_time + TABLE_PAUSE_TIME
+                    self.phase = PHASE_WAITING
+                    return
+            else:
+                left_speed, right_speed = self.junction_handler.current_turn_speeds
+        elif self.current_state == STATE_LOST:
+            self.speed_profiler.mark_lost()
+            segment = self.junction_handler.junction_count
+            if self.state_manager.previous_state != STATE_LOST and segment < MAX_ROUTE_STEPS:
+                self.segment_lost[segment] += 1
+            left_speed, right_speed = self.recovery_handler.handle_lost_line(
+                self.sensor_manager.last_valid_pattern
+            )
+        elif self.current_state == STATE_FINISHED:
+            left_speed, right_speed = 0, 0
+
+        self.left_speed, self.right_speed = left_speed, right_speed
+        self.motor_controller.set_motor_speed(left_speed, right_speed)
+
+    def record_junction(self):
+        """Store the time and segment distance of the junction just handled"""
+        distance = self.speed_profiler.on_junction()
+        index = self.junction_handler.junction_count - 1
+        if 0 <= index < MAX_ROUTE_STEPS:
+            self.junction_times[index] = time.time()
+            self.segment_distances[index] = math.nan if distance is None else distance
+
+    def cleanup(self):
+        """Stop the motors and release the board"""
+        try:
+            if self.motor_controller:
+                self.motor_controller.stop()
+        except Exception as e:
+            logging.error(f"Error stopping motor controller: {e}")
+
+        try:
+            if self.board:
+                self.board.exit()
+        except Exception as e:
+            logging.error(f"Error exiting board: {e}")
+
+        if self.phase != PHASE_FAILED:
+            self.phase = PHASE_STOPPED
+        self.publish()
+        self.channel.close()
+
+
+class SplitLineFollower:
+    """Service side of the split runtime, with the same interface as LineFollower"""
+
+    def __init__(self):
+        self.channel = None
+        self.process = None
+        self.log_queue = None
+        self.log_listener = None
+        self.db_handler = None
+        self.table_service = None
+        self.floor_map = None
+
+        self.route_id = 0
+        self.route = []
+        self.route_origin = None
+        self.route_destination = None
+        self.route_learn = True
+        self.route_started = False
+        self.schedule_pending = False
+        self.junctions_seen = 0
+        self.lost_seen = 0
+        self.last_loop_count = 0
+
+    def setup(self):
+        """Start the real-time process and initialize the service components"""
+        logging.info("Setting up line follower robot in split process mode...")
+
+        try:
+            self.channel = SharedChannel(create=True)
+            self.log_queue = multiprocessing.Queue()
+            self.process = multiprocessing.Process(
+                target=realtime_main,
+                args=(self.channel.name, self.log_queue),
+                name="realtime",
+                daemon=True
+            )
+            self.process.start()
+            self.log_listener = QueueListener(self.log_queue, *logging.getLogger().handlers)
+            self.log_listener.start()
+
+            self.db_handler = DatabaseHandler(
+                host=DB_HOST,
+                user=DB_USER,
+                password=DB_PASSWORD,
+                database=DB_NAME
+            )
+            self.floor_map = FloorMap()
+            self.floor_map.load()
+            self.table_service = TableService(self.db_handler, self.floor_map)
+            self.table_service.load_tables()
+
+            if not self.wait_for_realtime():
+                logging.error("Setup failed.")
+                return False
+
+            initial_route = self.table_service.get_route_to_next_table()
+            if initial_route:
+                self.send_route(initial_route)
+            else:
+                self.send_route(ROUTE_PLAN, learn=False)  # Use default if no route found
+            logging.info("Setup complete. Ready to start.")
+            return True
+
+        except Exception as e:
+            logging.error(f"Setup failed: {e}")
+            return False
+
+    def wait_for_realtime(self):
+        """Wait until the real-time process has set up the board"""
+        deadline = time.time() + REALTIME_START_TIMEOUT
+        while time.time() < deadline and self.process.is_alive():
+            status = self.channel.read_status()
+            phase = status["phase"] if status else PHASE_STARTING
+            if phase == PHASE_WAITING:
+                return True
+            if phase == PHASE_FAILED:
+                return False
+            time.sleep(SERVICE_POLL_INTERVAL)
+        logging.error("Real-time process did not start in time")
+        return False
+
+    def send_route(self, route, learn=True):
+        """Send a new route to the real-time process, learn is False for the fallback plan"""
+        self.route_id += 1
+        self.route = route
+        self.route_learn = learn
+        self.route_origin = self.table_service.route_origin
+        self.route_destination = self.table_service.current_destination
+        self.route_started = False
+        self.junctions_seen = 0
+        self.lost_seen = 0
+        distances = None
+        if learn:
+            distances = expected_distances(self.floor_map, route, self.route_origin, self.route_destination)
+        self.channel.write_route(self.route_id, route, distances)
+
+    def track_route(self, status):
+        """Feed junctions and LOST episodes reported by the real-time process into the floor map"""
+        if status["route_id"] != self.route_id:
+            return
+        if not self.route_started:
+            if self.route_learn:
+                self.floor_map.start_route(self.route, self.route_origin, self.route_destination,
+                                           timestamp=status["route_start"])
+            else:
+                self.floor_map.cancel_route()
+            self.route_started = True
+            if self.schedule_pending:
+                # Only now does the floor map know the leg being driven
+                self.table_service.get_schedule_etas()
+                self.schedule_pending = False
+
+        # Replay in order: the LOST episodes of a segment, then the junction that ends it
+        while self.junctions_seen < MAX_ROUTE_STEPS:
+            index = self.junctions_seen
+            while self.lost_seen < status["segment_lost"][index]:
+                self.floor_map.mark_lost()
+                self.lost_seen += 1
+            if index >= status["junction_count"]:
+                break
+            distance = status["segment_distances"][index]
+            self.floor_map.on_junction(None if math.isnan(distance) else distance,
+                                       timestamp=status["junction_times"][index])
+            self.junctions_seen += 1
+            self.lost_seen = 0
+
+    def log_status(self, status):
+        """Log the telemetry of a new control loop iteration"""
+        current_state = status["state"]
+        state_str = "█" if current_state == STATE_JUNCTION else (
+            "?" if current_state == STATE_LOST else "-")
+        sensors_str = "".join(["█" if s == 0 else "□" for s in status["readings"]])
+        logging.info(f"{state_str} [{sensors_str}] State: {current_state}")
+        logging.info(f"Left Speed: {status['left_speed']:.2f}, Right Speed: {status['right_speed']:.2f}, "
+                     f"loop: {status['loop_time'] * 1000:.1f}ms (max {status['max_loop_time'] * 1000:.1f}ms)")
+
+    def run(self):
+        """Service loop: follow the real-time status and plan the next routes"""
+        logging.info("Starting line follower in split process mode...")
+
+        try:
+            while True:
+                if not self.process.is_alive():
+                    logging.error("Real-time process stopped unexpectedly")
+                    return
+
+                status = self.channel.read_status()
+                if status is None:
+                    logging.warning("Could not read a consistent real-time status, retrying")
+                    time.sleep(SERVICE_POLL_INTERVAL)
+                    continue
+                if status["loop_count"] != self.last_loop_count:
+                    self.last_loop_count = status["loop_count"]
+                    self.log_status(status)
+                self.track_route(status)
+
+                if status["arrived_route_id"] == self.route_id and self.route_started:
+                    self.floor_map.finish_route(timestamp=status["arrival_time"])
+                    logging.info(f"Arrived at table {self.table_service.current_destination}. Pausing for {TABLE_PAUSE_TIME} seconds.")
+
+                    # Get route to next table
+                    next_route = self.table_service.get_route_to_next_table()
+                    if next_route:
+                        self.send_route(next_route)
+                        self.schedule_pending = True
+                    else:
+                        # No more tables, return to kitchen
+                        return_route = self.table_service.return_to_kitchen()
+                        if return_route:
+                            self.send_route(return_route)
+                            logging.info("Returning to kitchen.")
+                        else:
+                            logging.info("No return route found. Stopping.")
+                            return
+
+                time.sleep(SERVICE_POLL_INTERVAL)
+
+        except KeyboardInterrupt:
+            logging.info("Program stopped by user")
+        except Exception as e:
+            logging.error(f"Unexpected error: {e}")
+        finally:
+            self.cleanup()
+
+    def cleanup(self):
+        """Stop the real-time process and release shared resources"""
+        logging.info("Cleaning up resources...")
+
+        try:
+            if self.channel and self.process:
+                self.channel.write_route(self.route_id + 1, [], stop=True)
+                self.process.join(timeout=2.0)
+                if self.process.is_alive():
+                    logging.warning("Real-time process did not stop, terminating it")
+                    self.process.terminate()
+                    self.process.join()
+        except Exception as e:
+            logging.error(f"Error stopping real-time process: {e}")
+
+        if self.floor_map:
+            self.floor_map.save()
+
+        if self.log_listener:
+            self.log_listener.stop()
+
+        if self.channel:
+            self.channel.close()
+            self.channel.unlink()
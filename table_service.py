@@ -1,16 +1,19 @@
 """Table service functionality for the robot"""
 import logging
 
-from config import KITCHEN_START_POINT, TABLES_TO_VISIT, TABLES_FILTER
+from config import KITCHEN_START_POINT, TABLES_TO_VISIT, TABLES_FILTER, TABLE_PAUSE_TIME
 from database_handler import DatabaseHandler
+from floor_map import FloorMap
 
 
 class TableService:
     """Manages table service functionality"""
     
-    def __init__(self, db_handler=None):
+    def __init__(self, db_handler=None, floor_map=None):
         self.db_handler = db_handler if db_handler else DatabaseHandler()
+        self.floor_map = floor_map if floor_map else FloorMap()
         self.current_location = KITCHEN_START_POINT
+        self.route_origin = KITCHEN_START_POINT
         self.tables_to_visit = []
         self.current_destination = None
         self.route_complete = False
@@ -70,6 +73,7 @@ class TableService:
         route = self.db_handler.get_waypoints(self.current_location, next_table)
         if route:
             logging.info(f"Route from {self.current_location} to {next_table}: {route}")
+            self.route_origin = self.current_location
             self.current_location = next_table
             return route
         else:
@@ -81,8 +85,63 @@ class TableService:
         route = self.db_handler.get_waypoints(self.current_location, KITCHEN_START_POINT)
         if route:
             logging.info(f"Route from {self.current_location} to kitchen: {route}")
+            self.route_origin = self.current_location
+            self.current_destination = KITCHEN_START_POINT
             self.current_location = KITCHEN_START_POINT
             return route
         else:
             logging.warning(f"No route found from {self.current_location} to kitchen")
-            return None
\ No newline at end of file
+            return None
+
+    def estimate_eta(self, destination, origin=None):
+        """
+        Predict the travel time to a destination
+
+        Args:
+            destination (str): Destination table ID
+            origin (str): Starting table ID, defaults to the current location
+
+        Returns:
+            float: Expected travel time in seconds, or None if never driven
+        """
+        origin = self.current_location if origin is None else origin
+        return self.floor_map.estimate_eta(origin, destination)
+
+    def get_schedule_etas(self):
+        """
+        Predict arrival times for the table being driven to, the remaining
+        tables and the return to the kitchen
+
+        Times are cumulative from now and include the pause at each table.
+        When a route is in progress its destination comes first, with the
+        floor map's remaining time for that route.
+
+        Returns:
+            list: (table ID, seconds until arrival) tuples, with None once a leg is unknown
+        """
+        etas = []
+        elapsed = 0.0
+        location = self.current_location
+        if self.floor_map.route_start is not None:
+            elapsed = self.floor_map.remaining_time()
+            etas.append((self.current_destination, elapsed))
+            if elapsed is not None:
+                elapsed += TABLE_PAUSE_TIME
+
+        stops = self.tables_to_visit + [KITCHEN_START_POINT]
+        if etas and self.current_destination == KITCHEN_START_POINT:
+            stops = []  # Already on the way back to the kitchen
+
+        for table in stops:
+            leg = self.floor_map.estimate_eta(location, table)
+            if elapsed is None or leg is None:
+                elapsed = None
+            else:
+                elapsed += leg
+            etas.append((table, elapsed))
+            if elapsed is not None:
+                elapsed += TABLE_PAUSE_TIME
+            location = table
+
+        logging.info(f"Schedule ETAs: {etas}")
+        return etas